@@ -1,22 +1,38 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, BackgroundTasks, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.websockets import WebSocketState
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Sequence
 from passlib.context import CryptContext
 from faker import Faker
 import motor.motor_asyncio
+from pymongo.errors import OperationFailure, PyMongoError
+from pymongo.write_concern import WriteConcern
 import asyncio
+import atexit
 import random
+import numpy as np
+import sys
 import time
-import uuid
-import json
+import orjson
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 import os
 from jose import JWTError, jwt
+from cachetools import TTLCache
+import hashlib
+
+# Numba is optional; fraud scoring falls back to NumPy masks without it
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # Load environment variables
 load_dotenv()
@@ -37,14 +53,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger("fastapi-app")
 
+# Once the app starts, records go through a queue so stream I/O happens on a listener thread
+log_listener: Optional[QueueListener] = None
+
+def start_log_listener():
+    global log_listener
+    if log_listener is not None:
+        return
+    root = logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    # The listener takes over the configured handlers; the queue handler replaces them in the same step
+    log_listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    log_listener.start()
+    # Stopped at process exit rather than in shutdown_event, so records logged during teardown are still flushed
+    atexit.register(log_listener.stop)
+
 # Initialize FastAPI app and Faker
 app = FastAPI()
 fake = Faker()
 
 # MongoDB Configuration
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGODB_URI)
+client = motor.motor_asyncio.AsyncIOMotorClient(
+    MONGODB_URI,
+    maxPoolSize=int(os.getenv("MONGODB_MAX_POOL_SIZE", "50")),
+    minPoolSize=int(os.getenv("MONGODB_MIN_POOL_SIZE", "10")),
+    compressors="zstd",
+    retryWrites=False,
+)
 db = client["transaction_db"]
 transactions_collection = db["transactions"]
+# Unacknowledged writes for the fire-and-forget synthetic insert path only
+synthetic_transactions_collection = transactions_collection.with_options(write_concern=WriteConcern(w=0))
 
 # Create indexes for optimized queries
 async def create_indexes():
@@ -115,30 +155,48 @@ class Token(BaseModel):
     token_type: str
 
 
-# Initialize password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Initialize password context (rounds configurable for production deployments)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS, deprecated="auto")
+
+# Cheap context for the demo user, whose hash is computed lazily instead of at import time
+demo_pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto")
+DEMO_USER_EMAIL = "user@example.com"
 
 # Fake user database (for demonstration)
 fake_users_db = {
-    "user@example.com": {
-        "username": "user@example.com",
+    DEMO_USER_EMAIL: {
+        "username": DEMO_USER_EMAIL,
         "full_name": "John Doe",
-        "email": "user@example.com",
-        "hashed_password": pwd_context.hash("secret"),
+        "email": DEMO_USER_EMAIL,
+        "hashed_password": None,  # Filled in by demo_hash() on first use
         "disabled": False,
     }
 }
 
+def demo_hash() -> str:
+    demo_user = fake_users_db[DEMO_USER_EMAIL]
+    if demo_user["hashed_password"] is None:
+        demo_user["hashed_password"] = demo_pwd_context.hash("secret")
+    return demo_user["hashed_password"]
+
 
 # Authentication functions
 def verify_password(plain_password, hashed_password):
+    # The bcrypt hash embeds its own rounds, so either context can verify it
     return pwd_context.verify(plain_password, hashed_password)
 
-def authenticate_user(email: str, password: str):
+async def authenticate_user(email: str, password: str):
     user = fake_users_db.get(email)
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    # bcrypt is CPU-bound, so hashing and verification run off the event loop
+    if email == DEMO_USER_EMAIL:
+        await asyncio.to_thread(demo_hash)
+    hashed_password = user["hashed_password"]
+    if not hashed_password:
+        return False
+    if not await asyncio.to_thread(verify_password, password, hashed_password):
         return False
     return user
 
@@ -152,6 +210,21 @@ def create_access_token(data: dict, expires_delta: Optional[int] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Decoded JWT claims keyed by a hash of the token; the short TTL bounds the revocation window
+_jwt_cache = TTLCache(maxsize=10_000, ttl=5)
+
+def decoded_jwt(token: str) -> dict:
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _jwt_cache.get(key)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            return payload
+        _jwt_cache.pop(key, None)
+    # Raises JWTError for invalid tokens, which are never cached
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    _jwt_cache[key] = payload
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -159,7 +232,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decoded_jwt(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -170,14 +243,166 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
     return user
 
+# WebSocket broadcast batching configuration
+FLUSH_MS = int(os.getenv("FLUSH_MS", "50"))
+MAX_BATCH = int(os.getenv("MAX_BATCH", "140"))
+SEND_CHUNK = 50
+# Per-send deadline, so one client that stops reading cannot hold up frames for everyone else
+SEND_TIMEOUT = float(os.getenv("SEND_TIMEOUT", "5"))
+# Shards share one event loop, so more than one only splits fan-out into smaller groups
+WS_SHARDS = int(os.getenv("WS_SHARDS", "1"))
+SHARD_QUEUE_SIZE = int(os.getenv("SHARD_QUEUE_SIZE", "1000"))
+# A client with this many unsent messages is lagging and gets disconnected
+MAX_PENDING = int(os.getenv("MAX_PENDING", str(MAX_BATCH * 10)))
+
+# A subset of WebSocket clients with its own message queue, buffers and sender tasks
+class Shard:
+    def __init__(self):
+        # Each connected client maps to its buffer of pending serialized transactions
+        self.connections: Dict[WebSocket, List[bytes]] = {}
+        # Bounded; broadcast_bytes drops messages for this shard rather than blocking the producer when full
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SHARD_QUEUE_SIZE)
+        # Set by the consumer when a client's buffer reaches MAX_BATCH, so the flusher sends without waiting
+        self._batch_ready = asyncio.Event()
+        # Set whenever some client has buffered messages, so an idle shard's flusher sleeps instead of polling
+        self._pending = asyncio.Event()
+        self.dropped = 0
+        self._tasks: List[asyncio.Task] = []
+        self._close_tasks: set = set()
+        # At most one send per client at a time
+        self._in_flight: Dict[WebSocket, asyncio.Task] = {}
+    
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._consumer()),
+            asyncio.create_task(self._flusher()),
+        ]
+    
+    async def stop(self):
+        for task in (*self._tasks, *self._in_flight.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._in_flight.values(), *self._close_tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def add(self, websocket: WebSocket):
+        self.connections[websocket] = []
+    
+    def remove(self, websocket: WebSocket) -> bool:
+        # Dict removal is O(1) and tolerates sockets already dropped by the broadcast sweep
+        return self.connections.pop(websocket, None) is not None
+    
+    def _safe_remove(self, websocket: WebSocket):
+        if self.remove(websocket):
+            logger.info("Dropped dead WebSocket: %s", websocket.client)
+    
+    def _evict(self, websocket: WebSocket, reason: str):
+        # Drop a client that is still connected but not keeping up, and close it in the background
+        if not self.remove(websocket):
+            return
+        logger.warning("Evicting WebSocket %s: %s", websocket.client, reason)
+        task = asyncio.create_task(self._close(websocket))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=status.WS_1013_TRY_AGAIN_LATER), SEND_TIMEOUT)
+        except Exception:
+            pass  # The peer is already unresponsive; nothing more to do
+    
+    async def _consumer(self):
+        # Buffer each message per client; only the flusher sends, so this loop never waits on a client
+        while True:
+            message = await self.queue.get()
+            if self.connections:
+                self._pending.set()
+            lagging = []
+            for connection, buf in self.connections.items():
+                buf.append(message)
+                if len(buf) >= MAX_BATCH:
+                    self._batch_ready.set()
+                    if len(buf) >= MAX_PENDING:
+                        lagging.append(connection)
+            for connection in lagging:
+                self._evict(connection, "too many unsent messages")
+    
+    async def _send_batches(self, conns: Sequence[WebSocket]):
+        # Each client's frame is sent by its own task, so a slow client only delays itself;
+        # task creation is chunked so a large client count does not stall the event loop
+        for start in range(0, len(conns), SEND_CHUNK):
+            chunk = conns[start:start + SEND_CHUNK]
+            # Clients usually hold the same run of messages, so each distinct batch is joined once and shared.
+            # Every client sees messages in the same order, so first message + length identify the run.
+            payloads: Dict[tuple, bytes] = {}
+            for connection in chunk:
+                # The previous frame is still being sent; keep buffering until it completes
+                if connection in self._in_flight:
+                    continue
+                # Drop sockets already known to be closed instead of paying for a failed send
+                if connection.client_state != WebSocketState.CONNECTED:
+                    self._safe_remove(connection)
+                    continue
+                buf = self.connections.get(connection)
+                if not buf:
+                    continue
+                # Messages are already orjson-encoded, so splicing them is cheaper than re-encoding the batch
+                key = (id(buf[0]), len(buf))
+                payload = payloads.get(key)
+                if payload is None:
+                    payload = payloads[key] = b"[" + b",".join(buf) + b"]"
+                buf.clear()
+                self._in_flight[connection] = asyncio.create_task(self._send(connection, payload))
+            if start + SEND_CHUNK < len(conns):
+                await asyncio.sleep(0)
+    
+    async def _send(self, websocket: WebSocket, payload: bytes):
+        try:
+            await asyncio.wait_for(websocket.send_bytes(payload), SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._evict(websocket, "send timed out")
+        except Exception as e:
+            logger.error("Error sending message: %s", e)
+            self._safe_remove(websocket)
+        finally:
+            self._in_flight.pop(websocket, None)
+            # Messages buffered while this frame was in flight still need a flush
+            if self.connections.get(websocket):
+                self._pending.set()
+    
+    async def _flusher(self):
+        while True:
+            await self._pending.wait()
+            # Let more messages join the batch for up to FLUSH_MS, unless a buffer has already filled up
+            if not self._batch_ready.is_set():
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), FLUSH_MS / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            self._pending.clear()
+            self._batch_ready.clear()
+            await self._send_batches(tuple(c for c, buf in self.connections.items() if buf))
+
 # WebSocket Connection Manager with Authentication
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, num_shards: int = WS_SHARDS):
+        # Clients are spread over shards so each sender task fans out to a smaller group
+        self.shards: List[Shard] = [Shard() for _ in range(max(num_shards, 1))]
+    
+    def _shard_for(self, websocket: WebSocket) -> Shard:
+        return self.shards[hash(websocket) % len(self.shards)]
+    
+    def start(self):
+        # Needs a running event loop, so it is started from the startup event
+        for shard in self.shards:
+            shard.start()
+    
+    async def stop(self):
+        for shard in self.shards:
+            await shard.stop()
     
     async def connect(self, websocket: WebSocket, token: str):
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = decoded_jwt(token)
             email: str = payload.get("sub")
             if email is None or email not in fake_users_db:
                 raise JWTError
@@ -185,20 +410,24 @@ class ConnectionManager:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected: {websocket.client}")
+        self._shard_for(websocket).add(websocket)
+        logger.info("WebSocket connected: %s", websocket.client)
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected: {websocket.client}")
+        self._shard_for(websocket).remove(websocket)
+        logger.info("WebSocket disconnected: %s", websocket.client)
     
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    async def broadcast_bytes(self, message: bytes):
+        # The message is encoded once by the caller and shared by every client;
+        # each shard's own tasks do the buffering and sending
+        # Never blocks: a slow client must not throttle ingest, so a full shard queue drops the message
+        for shard in self.shards:
             try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending message: {e}")
-                self.active_connections.remove(connection)
+                shard.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                shard.dropped += 1
+                if shard.dropped % 128 == 1:
+                    logger.warning("Shard queue full; dropped %d messages so far", shard.dropped)
 
 manager = ConnectionManager()
 
@@ -264,85 +493,282 @@ MERCHANT_CATEGORIES = [
 
 TRANSACTION_TYPES = ["POS", "Online", "ATM Withdrawal", "Mobile Payment", "Recurring Payment"]
 
-# Function to generate a transaction with advanced fraud detection
-async def generate_transaction() -> dict:
-    country = random.choice(list(COUNTRY_CURRENCY_MAP.keys()))
-    currency = COUNTRY_CURRENCY_MAP[country]
-    amount = round(random.uniform(5, 10000), 2)
-    timestamp = time.time()
+# Pools of pre-generated Faker data, so the hot path avoids per-call provider work
+USER_POOL_SIZE = 10_000
+MERCHANT_POOL_SIZE = 5_000
+LOCALITY_POOL_SIZE = 2_000
+POOL_REFRESH_SECONDS = 3600
+
+USER_POOL: List[dict] = []
+MERCHANT_POOL: List[str] = []
+CITY_POOL: List[str] = []
+STATE_POOL: List[str] = []
+
+def _fake_user() -> dict:
+    return {
+        "name": fake.name(),
+        "email": fake.email(),
+        "phone_number": fake.phone_number(),
+        "address": fake.address().replace("\n", ", "),
+        "ip_address": fake.ipv4_public(),
+        "credit_card": {
+            "number": fake.credit_card_number(),
+            "expiration_date": fake.credit_card_expire(),
+            "provider": fake.credit_card_provider(),
+            "security_code": fake.credit_card_security_code()
+        }
+    }
+
+def build_fake_pools():
+    # Build into new lists and swap them in, so readers never see a partially built pool
+    global USER_POOL, MERCHANT_POOL, CITY_POOL, STATE_POOL
+    USER_POOL = [_fake_user() for _ in range(USER_POOL_SIZE)]
+    MERCHANT_POOL = [fake.company() for _ in range(MERCHANT_POOL_SIZE)]
+    CITY_POOL = [fake.city() for _ in range(LOCALITY_POOL_SIZE)]
+    STATE_POOL = [fake.state() for _ in range(LOCALITY_POOL_SIZE)]
+    logger.info("Fake data pools built.")
+
+# Background task to periodically rebuild the pools for variety
+async def pool_refresher():
+    try:
+        while True:
+            await asyncio.sleep(POOL_REFRESH_SECONDS)
+            await asyncio.to_thread(build_fake_pools)
+    except asyncio.CancelledError:
+        logger.info("Pool refresher task cancelled.")
+
+# Fraud rule inputs, precomputed once so rules can be evaluated as array masks
+COUNTRIES = tuple(COUNTRY_CURRENCY_MAP)
+CURRENCIES = tuple(COUNTRY_CURRENCY_MAP[c] for c in COUNTRIES)
+CAT_ARR = np.array(MERCHANT_CATEGORIES)
+TYPE_ARR = np.array(TRANSACTION_TYPES)
+SAFE_COUNTRIES = frozenset({"United States", "Canada", "United Kingdom", "Germany", "France", "Japan", "Australia", "India"})
+IS_SAFE_COUNTRY = np.array([c in SAFE_COUNTRIES for c in COUNTRIES])
+
+# Reason index 0 means "not flagged"; the rest follow rule priority order
+FRAUD_REASONS = (
+    None,
+    sys.intern("High Value Transaction"),
+    sys.intern("Unusual Geographical Location"),
+    sys.intern("Multiple Failed Attempts"),
+    sys.intern("Suspicious Transaction Pattern"),
+)
+
+# Shared, read-only fraud_detection sub-documents, one per reason index, so none are built per transaction
+FRAUD_DETECTIONS = tuple({"flagged": reason is not None, "reason": reason} for reason in FRAUD_REASONS)
+
+# Fraud scoring kernel: a single fused pass under Numba, NumPy masks when Numba is not installed
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _score_kernel(amounts, country_safe, activity, pattern_roll, reason_out):
+        for i in range(amounts.shape[0]):
+            amount = amounts[i]
+            if amount > 8000:
+                reason_out[i] = 1
+            elif not country_safe[i]:
+                reason_out[i] = 2
+            elif activity[i] < 0.01:  # 1% chance for suspicious activity
+                reason_out[i] = 3
+            elif 5000 < amount <= 8000 and pattern_roll[i] < 0.05:
+                reason_out[i] = 4
+            else:
+                reason_out[i] = 0
+
+def score_fraud(amounts, country_idx, activity, pattern_roll):
+    """Return an index into FRAUD_REASONS for each transaction, honouring rule priority."""
+    country_safe = IS_SAFE_COUNTRY[country_idx]
+    if HAS_NUMBA:
+        reason_out = np.empty(amounts.shape[0], dtype=np.int64)
+        _score_kernel(amounts, country_safe, activity, pattern_roll, reason_out)
+        return reason_out
+    return np.select(
+        [
+            amounts > 8000,
+            ~country_safe,
+            activity < 0.01,  # 1% chance for suspicious activity
+            (amounts > 5000) & (amounts <= 8000) & (pattern_roll < 0.05),
+        ],
+        [1, 2, 3, 4],
+        default=0,
+    )
+
+def warm_fraud_kernel():
+    # Compiles the Numba kernel (or loads its on-disk cache) with the dtypes generate_transactions uses,
+    # so the first batch does not compile on the event loop
+    score_fraud(np.zeros(1), np.zeros(1, dtype=np.int64), np.zeros(1), np.zeros(1))
+
+GENERATOR_BATCH_SIZE = 256
+rng = np.random.default_rng()
+
+# Function to generate a batch of transactions with advanced fraud detection;
+# transaction_details.timestamp is left for transaction_generator to stamp at emission
+async def generate_transactions(n: int = GENERATOR_BATCH_SIZE) -> List[dict]:
+    amounts = np.round(rng.uniform(5, 10000, n), 2)
+    country_idx = rng.integers(0, len(COUNTRIES), n)
+    user_activity = rng.random(n)
+    pattern_roll = rng.random(n)
     
-    # Advanced fraud detection logic
-    flagged = False
-    reason = ""
-    user_activity = random.random()
+    # Advanced fraud detection logic, evaluated for the whole batch
+    reason_idx = score_fraud(amounts, country_idx, user_activity, pattern_roll)
     
-    if amount > 8000:
-        flagged = True
-        reason = "High Value Transaction"
-    elif country not in ["United States", "Canada", "United Kingdom", "Germany", "France", "Japan", "Australia", "India"]:
-        flagged = True
-        reason = "Unusual Geographical Location"
-    elif user_activity < 0.01:  # 1% chance for suspicious activity
-        flagged = True
-        reason = "Multiple Failed Attempts"
-    elif 5000 < amount <= 8000 and random.random() < 0.05:
-        flagged = True
-        reason = "Suspicious Transaction Pattern"
+    # Sample every categorical field in bulk; tolist() hands back plain Python values for orjson/BSON
+    categories = CAT_ARR[rng.integers(0, len(CAT_ARR), n)].tolist()
+    types = TYPE_ARR[rng.integers(0, len(TYPE_ARR), n)].tolist()
+    user_idx = rng.integers(0, len(USER_POOL), n).tolist()
+    merchant_idx = rng.integers(0, len(MERCHANT_POOL), n).tolist()
+    city_idx = rng.integers(0, len(CITY_POOL), n).tolist()
+    state_idx = rng.integers(0, len(STATE_POOL), n).tolist()
+    # One urandom read per batch instead of one per transaction; each id is 32 hex chars
+    id_hex = os.urandom(16 * n).hex()
     
-    transaction = {
-        "transaction_id": str(uuid.uuid4()),
-        "user": {
-            "name": fake.name(),
-            "email": fake.email(),
-            "phone_number": fake.phone_number(),
-            "address": fake.address().replace("\n", ", "),
-            "ip_address": fake.ipv4_public(),
-            "credit_card": {
-                "number": fake.credit_card_number(),
-                "expiration_date": fake.credit_card_expire(),
-                "provider": fake.credit_card_provider(),
-                "security_code": fake.credit_card_security_code()
-            }
-        },
-        "transaction_details": {
-            "amount": amount,
-            "currency": currency,
-            "timestamp": timestamp,
-            "merchant": fake.company(),
-            "merchant_category": random.choice(MERCHANT_CATEGORIES),
-            "location": {
-                "city": fake.city(),
-                "state": fake.state(),
-                "country": country,
+    transactions = []
+    for i, (amount, ci, ri) in enumerate(zip(amounts.tolist(), country_idx.tolist(), reason_idx.tolist())):
+        transactions.append({
+            "transaction_id": id_hex[32 * i:32 * i + 32],
+            "user": USER_POOL[user_idx[i]],
+            "transaction_details": {
+                "amount": amount,
+                "currency": CURRENCIES[ci],
+                "merchant": MERCHANT_POOL[merchant_idx[i]],
+                "merchant_category": categories[i],
+                "location": {
+                    "city": CITY_POOL[city_idx[i]],
+                    "state": STATE_POOL[state_idx[i]],
+                    "country": COUNTRIES[ci],
+                },
+                "transaction_type": types[i],
             },
-            "transaction_type": random.choice(TRANSACTION_TYPES),
-        },
-        "fraud_detection": {
-            "flagged": flagged,
-            "reason": reason if flagged else None
-        }
-    }
-    return transaction
+            "fraud_detection": FRAUD_DETECTIONS[ri]
+        })
+    return transactions
+
+# Buffered MongoDB inserts, flushed with insert_many by size or on a timer
+INSERT_BATCH_SIZE = 100
+INSERT_FLUSH_SECONDS = 1.0
+_insert_buf: List[dict] = []
+_insert_tasks: set = set()
+_insert_batches = 0
+
+def flush_inserts():
+    global _insert_batches
+    if not _insert_buf:
+        return
+    docs, _insert_buf[:] = _insert_buf[:], []
+    task = asyncio.create_task(synthetic_transactions_collection.insert_many(docs, ordered=False))
+    # Keep a reference until the insert completes so the task is not garbage collected
+    _insert_tasks.add(task)
+    task.add_done_callback(_insert_done)
+    # Sampled: only every 128th batch is logged
+    _insert_batches += 1
+    if not (_insert_batches & 0x7F):
+        logger.info("Inserted %d batches; latest has %d transactions", _insert_batches, len(docs))
+
+def _insert_done(task: asyncio.Task):
+    _insert_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error inserting transactions: %s", task.exception())
+
+async def insert_flusher():
+    try:
+        while True:
+            await asyncio.sleep(INSERT_FLUSH_SECONDS)
+            flush_inserts()
+    except asyncio.CancelledError:
+        logger.info("Insert flusher task cancelled.")
+
+async def drain_inserts():
+    flush_inserts()
+    if _insert_tasks:
+        await asyncio.gather(*_insert_tasks, return_exceptions=True)
+
+def encode_transaction(document: dict) -> bytes:
+    document.pop("_id", None)  # ObjectId is not JSON serializable
+    return orjson.dumps(document)
 
 # Background task to generate transactions
-async def transaction_generator():
+async def transaction_generator(broadcast: bool = False):
     try:
         while True:
-            transaction = await generate_transaction()
-            # Insert into MongoDB
-            await transactions_collection.insert_one(transaction)
-            logger.info(f"Inserted transaction {transaction['transaction_id']}")
-            # Broadcast to WebSocket clients
-            await manager.broadcast(json.dumps(transaction))
-            await asyncio.sleep(random.uniform(0.5, 3))  # Random delay between transactions
+            for transaction in await generate_transactions():
+                # Stamp at emission time, since a batch is paced out over several minutes
+                transaction["transaction_details"]["timestamp"] = time.time()
+                # Without change streams, broadcast in-process (before insert_many adds the ObjectId _id)
+                if broadcast:
+                    await manager.broadcast_bytes(encode_transaction(transaction))
+                # Queue for a batched MongoDB insert; otherwise WebSocket clients are fed by the change stream
+                _insert_buf.append(transaction)
+                if len(_insert_buf) >= INSERT_BATCH_SIZE:
+                    flush_inserts()
+                await asyncio.sleep(random.uniform(0.5, 3))  # Random delay between transactions
     except asyncio.CancelledError:
         logger.info("Transaction generator task cancelled.")
 
+# Change stream consumer that feeds WebSocket clients from inserted documents
+CHANGE_STREAM_BATCH_SIZE = 128
+CHANGE_STREAM_MAX_AWAIT_MS = 500
+CHANGE_STREAM_RETRY_SECONDS = 5
+
+async def supports_change_streams() -> bool:
+    # Change streams are only available on replica sets and sharded clusters
+    try:
+        hello = await client.admin.command("hello")
+    except PyMongoError as e:
+        logger.error("Could not determine MongoDB topology: %s", e)
+        return False
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+async def change_feed():
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    broadcast_count = 0
+    resume_token = None
+    try:
+        while True:
+            try:
+                # Resume after the last delivered change so inserts made while reconnecting are not lost
+                async with transactions_collection.watch(
+                    pipeline,
+                    batch_size=CHANGE_STREAM_BATCH_SIZE,
+                    max_await_time_ms=CHANGE_STREAM_MAX_AWAIT_MS,
+                    resume_after=resume_token,
+                ) as stream:
+                    async for change in stream:
+                        await manager.broadcast_bytes(encode_transaction(change["fullDocument"]))
+                        resume_token = stream.resume_token
+                        broadcast_count += 1
+                        if not (broadcast_count & 0x7F):
+                            logger.info("Broadcast %d transactions from change stream", broadcast_count)
+            except OperationFailure as e:
+                # The server rejected the stream, e.g. the resume point fell out of the oplog; start fresh
+                logger.error("Change stream failed, reopening without resume token: %s", e)
+                resume_token = None
+                await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+            except PyMongoError as e:
+                logger.error("Change stream error: %s", e)
+                await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+    except asyncio.CancelledError:
+        logger.info("Change feed task cancelled.")
+
 # Startup event to initiate background transaction generation
 @app.on_event("startup")
 async def startup_event():
+    start_log_listener()
     await create_indexes()
-    app.state.transaction_task = asyncio.create_task(transaction_generator())
+    await asyncio.to_thread(build_fake_pools)
+    await asyncio.to_thread(warm_fraud_kernel)
+    manager.start()
+    use_change_stream = await supports_change_streams()
+    if use_change_stream:
+        app.state.change_feed_task = asyncio.create_task(change_feed())
+        logger.info("Broadcasting transactions from the MongoDB change stream.")
+    else:
+        app.state.change_feed_task = None
+        logger.warning(
+            "MongoDB is not a replica set, so change streams are unavailable; "
+            "broadcasting from the in-process generator instead (single worker only)."
+        )
+    app.state.transaction_task = asyncio.create_task(transaction_generator(broadcast=not use_change_stream))
+    app.state.pool_task = asyncio.create_task(pool_refresher())
+    app.state.insert_task = asyncio.create_task(insert_flusher())
     logger.info("Transaction generator started.")
 
 # Shutdown event to gracefully terminate background tasks
@@ -350,6 +776,15 @@ async def startup_event():
 async def shutdown_event():
     app.state.transaction_task.cancel()
     await app.state.transaction_task
+    app.state.pool_task.cancel()
+    await app.state.pool_task
+    app.state.insert_task.cancel()
+    await app.state.insert_task
+    await drain_inserts()
+    if app.state.change_feed_task is not None:
+        app.state.change_feed_task.cancel()
+        await app.state.change_feed_task
+    await manager.stop()
     logger.info("Transaction generator stopped.")
 
 # Serve index.html
@@ -358,20 +793,20 @@ async def index(request: Request, current_user: dict = Depends(get_current_user)
     return templates.TemplateResponse("index.html", {"request": request, "user": current_user})
 
 # Serve transaction data with pagination
-@app.get("/transactions", response_model=List[Transaction])
+# Documents come from our own writes, so they are returned as-is rather than revalidated through Transaction
+@app.get("/transactions", response_model=None, responses={200: {"model": List[Transaction]}})
 async def get_transactions(limit: int = 100, skip: int = 0, current_user: dict = Depends(get_current_user)):
-    cursor = transactions_collection.find().sort("transaction_details.timestamp", -1).skip(skip).limit(limit)
-    transactions = []
-    async for document in cursor:
-        transactions.append(Transaction(**document))
-    return transactions
+    cursor = transactions_collection.find({}, projection={"_id": 0}).sort("transaction_details.timestamp", -1).skip(skip).limit(limit)
+    # The cursor is already limited; length=None also accepts the negative limits Mongo allows
+    transactions = await cursor.to_list(length=None)
+    return Response(content=orjson.dumps(transactions), media_type="application/json")
 
 # Token endpoint for user authentication
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
-        logger.warning(f"Failed login attempt for user: {form_data.username}")
+        logger.warning("Failed login attempt for user: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -380,7 +815,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     access_token = create_access_token(
         data={"sub": user["email"]}, expires_delta=ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    logger.info(f"User {user['email']} logged in successfully.")
+    logger.info("User %s logged in successfully.", user["email"])
     return {"access_token": access_token, "token_type": "bearer"}
 
 # WebSocket endpoint for real-time transactions with token authentication
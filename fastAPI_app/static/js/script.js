@@ -70,22 +70,29 @@ function connectWebSocket() {
     const wsProtocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
     const wsUrl = `${wsProtocol}://${window.location.host}/ws/transactions?token=${accessToken}`;
     const ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer';
+    const decoder = new TextDecoder();
 
     ws.onopen = function(event) {
         console.log("WebSocket connection established.");
     };
 
     ws.onmessage = function(event) {
-        const transaction = JSON.parse(event.data);
-        const label = transaction.transaction_id.substring(0, 8); // Shorten ID for display
-        const amount = transaction.transaction_details.amount;
+        // The server batches transactions into a single JSON array per frame
+        const data = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+        const transactions = JSON.parse(data);
 
-        // Add data to chart
-        transactionChart.data.labels.push(label);
-        transactionChart.data.datasets[0].data.push(amount);
+        transactions.forEach(transaction => {
+            const label = transaction.transaction_id.substring(0, 8); // Shorten ID for display
+            const amount = transaction.transaction_details.amount;
+
+            // Add data to chart
+            transactionChart.data.labels.push(label);
+            transactionChart.data.datasets[0].data.push(amount);
+        });
 
         // Keep only the latest 20 transactions
-        if (transactionChart.data.labels.length > 20) {
+        while (transactionChart.data.labels.length > 20) {
             transactionChart.data.labels.shift();
             transactionChart.data.datasets[0].data.shift();
         }